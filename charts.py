@@ -1,16 +1,30 @@
 import streamlit as st
 
+from sections import section_selector
+
 st.header("Chart elements")
 chart_data = st.session_state.chart_data
 map_data = st.session_state.map_data
 
-st.subheader("Area chart")
-st.area_chart(chart_data)
-st.subheader("Bar chart")
-st.bar_chart(chart_data)
-st.subheader("Line chart")
-st.line_chart(chart_data)
-st.subheader("Scatter chart")
-st.scatter_chart(chart_data)
-st.subheader("Map")
-st.map(map_data, color=st.get_option("theme.chartCategoricalColors")[0])
+sections = ["Area chart", "Bar chart", "Line chart", "Scatter chart", "Map"]
+if st.session_state.get("lazy_rendering", False):
+    # Only build the selected chart; the others are rendered on demand
+    visible = [section_selector("Chart type", sections, key="charts_section")]
+else:
+    visible = sections
+
+if "Area chart" in visible:
+    st.subheader("Area chart")
+    st.area_chart(chart_data)
+if "Bar chart" in visible:
+    st.subheader("Bar chart")
+    st.bar_chart(chart_data)
+if "Line chart" in visible:
+    st.subheader("Line chart")
+    st.line_chart(chart_data)
+if "Scatter chart" in visible:
+    st.subheader("Scatter chart")
+    st.scatter_chart(chart_data)
+if "Map" in visible:
+    st.subheader("Map")
+    st.map(map_data, color=st.get_option("theme.chartCategoricalColors")[0])
@@ -0,0 +1,22 @@
+import streamlit as st
+
+
+def _keep_selection(key):
+    # Clicking the selected option deselects it; keep showing the last section
+    if st.session_state[key] is None:
+        st.session_state[key] = st.session_state[f"{key}_last"]
+    st.session_state[f"{key}_last"] = st.session_state[key]
+
+
+def section_selector(label, sections, key):
+    """Segmented control that always has exactly one section selected."""
+    st.session_state.setdefault(key, sections[0])
+    st.session_state.setdefault(f"{key}_last", st.session_state[key])
+    return st.segmented_control(
+        label,
+        sections,
+        key=key,
+        on_change=_keep_selection,
+        args=(key,),
+        label_visibility="collapsed",
+    )
@@ -39,8 +39,14 @@ theme_from_url = query_params.get("theme", None)
 
 # Initialize session state for theme selection
 if "selected_theme" not in st.session_state:
-    # If theme is in URL and valid, use it; otherwise use default
-    if theme_from_url and theme_from_url in available_themes:
+    # A stored theme means this tab reconnected (e.g. to another replica),
+    # since stored themes are keyed per tab; keep it and sync the URL.
+    # Otherwise use the theme from the URL if valid, else the default.
+    stored_theme = theme_loader.get_session_theme_name()
+    if stored_theme in available_themes:
+        st.session_state.selected_theme = stored_theme
+        st.query_params["theme"] = stored_theme
+    elif theme_from_url and theme_from_url in available_themes:
         st.session_state.selected_theme = theme_from_url
     elif theme_from_url:
         # Try with -theme suffix
@@ -140,6 +146,22 @@ pages = [
 ]
 
 page = st.navigation(pages)
+
+# Keep the toggle's value while it's hidden on other pages
+if "lazy_rendering" in st.session_state:
+    st.session_state.lazy_rendering = st.session_state.lazy_rendering
+
+# Render only the visible tab/section on the heavier pages
+if page.title in ("Widgets", "Charts"):
+    st.sidebar.toggle(
+        "Render visible section only",
+        key="lazy_rendering",
+        help=(
+            "Skip building hidden tabs and charts to keep reruns fast. "
+            "Widget values in hidden sections reset when you switch sections."
+        ),
+    )
+
 page.run()
 
 with st.sidebar.container(height=310):
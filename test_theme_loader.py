@@ -0,0 +1,269 @@
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from streamlit.runtime.app_session import AppSession
+
+import theme_loader
+
+THEMES_DIR = str(Path(__file__).parent / "themes")
+
+
+class BytesKeyValueClient(theme_loader.LocalKeyValueClient):
+    """Returns bytes like redis-py does without decode_responses."""
+
+    def get(self, key):
+        value = super().get(key)
+        return value.encode() if value is not None else None
+
+
+class CountingKeyValueClient(theme_loader.LocalKeyValueClient):
+    def __init__(self):
+        super().__init__()
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return super().get(key)
+
+
+def test_key_value_store_is_shared_between_instances():
+    client = theme_loader.LocalKeyValueClient()
+    replica_a = theme_loader.KeyValueThemeStore(client)
+    replica_b = theme_loader.KeyValueThemeStore(client)
+
+    replica_a.set("client", "nord-theme")
+
+    assert replica_b.get("client") == "nord-theme"
+    assert replica_b.get("other-client") is None
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    db_path = str(tmp_path / "themes.db")
+    worker_a = theme_loader.SQLiteThemeStore(db_path)
+    worker_b = theme_loader.SQLiteThemeStore(db_path)
+
+    worker_a.set("client", "nord-theme")
+
+    assert worker_b.get("client") == "nord-theme"
+
+
+def test_sqlite_store_prunes_old_entries(tmp_path):
+    db_path = str(tmp_path / "themes.db")
+    store = theme_loader.SQLiteThemeStore(db_path, max_age=-1)
+    store.set("client", "nord-theme")
+
+    assert theme_loader.SQLiteThemeStore(db_path).get("client") is None
+
+
+def test_key_value_store_decodes_bytes():
+    client = BytesKeyValueClient()
+    theme_loader.KeyValueThemeStore(client).set("client", "nord-theme")
+
+    assert theme_loader.KeyValueThemeStore(client).get("client") == "nord-theme"
+
+
+def test_read_through_cache_expires():
+    client = theme_loader.LocalKeyValueClient()
+    writer = theme_loader.KeyValueThemeStore(client)
+    cached = theme_loader.KeyValueThemeStore(client, ttl=60)
+    expired = theme_loader.KeyValueThemeStore(client, ttl=0)
+    assert cached.get("client") is None
+    assert expired.get("client") is None
+
+    writer.set("client", "nord-theme")
+
+    assert cached.get("client") is None
+    assert expired.get("client") == "nord-theme"
+
+
+def test_read_through_cache_caches_misses_and_is_bounded():
+    client = CountingKeyValueClient()
+    store = theme_loader.KeyValueThemeStore(client, ttl=60, maxsize=2)
+
+    assert store.get("client") is None
+    assert store.get("client") is None
+    assert client.gets == 1
+
+    # Reading two more keys evicts "client" from the cache
+    store.get("a")
+    store.get("b")
+    assert client.gets == 3
+    store.get("client")
+    assert client.gets == 4
+    store.get("b")
+    assert client.gets == 4
+
+
+def test_incomplete_store_cannot_be_instantiated():
+    class IncompleteStore(theme_loader.ThemeStore):
+        def get(self, client_key):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
+
+
+def test_theme_file_is_reparsed_when_changed(tmp_path):
+    theme_path = tmp_path / "custom-theme.toml"
+    theme_path.write_text('[theme]\nbase = "light"\n')
+    assert theme_loader._load_theme_data(theme_path) == {"base": "light"}
+
+    theme_path.write_text('[theme]\nbase = "dark"\n')
+    stat = theme_path.stat()
+    os.utime(theme_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert theme_loader._load_theme_data(theme_path) == {"base": "dark"}
+
+
+def use_session(monkeypatch, session_id, query_params=None):
+    """Switch to a script run for the given session (and tab URL)."""
+    ctx = SimpleNamespace(session_id=session_id)
+    monkeypatch.setattr(theme_loader, "get_script_run_ctx", lambda: ctx)
+    monkeypatch.setattr(theme_loader.st, "query_params", query_params or {})
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Run theme_loader as if inside a script run for one session."""
+    reruns = []
+    monkeypatch.setattr(theme_loader, "_PATCHED", True)
+    monkeypatch.setattr(theme_loader, "_STORE", theme_loader.InMemoryThemeStore())
+    monkeypatch.setattr(theme_loader, "_SESSION_CLIENT_IDS", {})
+    monkeypatch.setattr(theme_loader, "_get_cookie", lambda session_id, name: "browser")
+    use_session(monkeypatch, "s1")
+    monkeypatch.setattr(theme_loader.st, "rerun", lambda: reruns.append(True))
+    return reruns
+
+
+@pytest.fixture
+def shared_store(monkeypatch):
+    store = theme_loader.KeyValueThemeStore(theme_loader.LocalKeyValueClient())
+    monkeypatch.setattr(theme_loader, "_STORE", store)
+    return store
+
+
+def test_load_theme_skips_rerun_when_unchanged(session):
+    assert theme_loader.load_theme_by_name("nord-theme", THEMES_DIR) is True
+    assert theme_loader.load_theme_by_name("nord-theme", THEMES_DIR) is False
+    assert len(session) == 1
+
+    assert theme_loader.load_theme(f"{THEMES_DIR}/dracula-theme.toml") is True
+    assert len(session) == 2
+
+
+def test_load_theme_rejects_other_themes_dir(session, tmp_path):
+    theme_loader.load_theme_by_name("nord-theme", THEMES_DIR)
+    (tmp_path / "nord-theme.toml").write_text('[theme]\nbase = "dark"\n')
+
+    with pytest.raises(ValueError):
+        theme_loader.load_theme(str(tmp_path / "nord-theme.toml"))
+    assert theme_loader.get_current_session_theme_data()["primaryColor"]
+
+
+def test_store_holds_theme_name_resolved_locally(session):
+    theme_loader.load_theme_by_name("nord-theme", THEMES_DIR)
+
+    assert theme_loader._STORE.get("s1") == "nord-theme"
+    assert theme_loader.get_session_theme_name() == "nord-theme"
+    assert theme_loader.get_current_session_theme_data()["primaryColor"]
+
+
+def test_invalid_stored_theme_name_is_ignored(session):
+    theme_loader._STORE.set("s1", "../../etc/passwd")
+
+    assert theme_loader.get_session_theme_name() is None
+    assert theme_loader.get_current_session_theme_data() is None
+
+
+def test_in_memory_store_is_keyed_by_session(session, monkeypatch):
+    theme_loader.load_theme_by_name("nord-theme", THEMES_DIR)
+
+    # A new session in the same browser starts without a stored theme
+    use_session(monkeypatch, "s2")
+    assert theme_loader.get_session_theme_name() is None
+
+
+def test_shared_store_adds_client_id_to_url(session, shared_store):
+    query_params = theme_loader.st.query_params
+    theme_loader.load_theme_by_name("nord-theme", THEMES_DIR)
+
+    assert query_params[theme_loader._CLIENT_PARAM]
+
+
+def test_shared_store_restores_theme_after_reconnect(
+    session, shared_store, monkeypatch
+):
+    use_session(monkeypatch, "s1", {"client": "tab-a"})
+    theme_loader.load_theme_by_name("nord-theme", THEMES_DIR)
+
+    # Reconnect to another replica: new session ID, same tab URL
+    use_session(monkeypatch, "s2", {"client": "tab-a"})
+    assert theme_loader.get_session_theme_name() == "nord-theme"
+    assert theme_loader.load_theme_by_name("nord-theme", THEMES_DIR) is False
+    assert len(session) == 1
+
+
+def test_shared_store_keeps_tabs_separate(session, shared_store, monkeypatch):
+    use_session(monkeypatch, "s1", {"client": "tab-a"})
+    theme_loader.load_theme_by_name("nord-theme", THEMES_DIR)
+    use_session(monkeypatch, "s2", {"client": "tab-b"})
+    assert theme_loader.get_session_theme_name() is None
+    theme_loader.load_theme_by_name("dracula-theme", THEMES_DIR)
+    assert len(session) == 2
+
+    # Further runs of either tab don't overwrite each other or rerun
+    for session_id, client_id, theme_name in [
+        ("s1", "tab-a", "nord-theme"),
+        ("s2", "tab-b", "dracula-theme"),
+        ("s1", "tab-a", "nord-theme"),
+    ]:
+        use_session(monkeypatch, session_id, {"client": client_id})
+        assert theme_loader.get_session_theme_name() == theme_name
+        assert theme_loader.load_theme_by_name(theme_name, THEMES_DIR) is False
+    assert len(session) == 2
+
+
+def test_shared_link_does_not_share_entry_across_browsers(
+    session, shared_store, monkeypatch
+):
+    use_session(monkeypatch, "s1", {"client": "tab-a"})
+    theme_loader.load_theme_by_name("nord-theme", THEMES_DIR)
+
+    # Same URL opened in another browser (different cookie)
+    monkeypatch.setattr(theme_loader, "_get_cookie", lambda session_id, name: "other")
+    use_session(monkeypatch, "s2", {"client": "tab-a"})
+    assert theme_loader.get_session_theme_name() is None
+
+
+def test_rerun_request_restores_theme_before_script_runs(
+    session, shared_store, monkeypatch
+):
+    use_session(monkeypatch, "s1", {"client": "tab-a"})
+    theme_loader.load_theme_by_name("nord-theme", THEMES_DIR)
+
+    # Patch stand-ins so the real AppSession and config stay untouched
+    monkeypatch.setattr(theme_loader, "_PATCHED", False)
+    for name in ("_create_new_session_message", "request_rerun", "shutdown"):
+        monkeypatch.setattr(AppSession, name, lambda self, *args, **kwargs: None)
+    monkeypatch.setattr(
+        theme_loader.config, "get_options_for_section", lambda section: {}
+    )
+    theme_loader._apply_patch()
+
+    # Reconnect to another replica: the rerun request carries the tab URL
+    app_session = SimpleNamespace(id="s2")
+    client_state = SimpleNamespace(query_string="client=tab-a")
+    AppSession.request_rerun(app_session, client_state)
+    monkeypatch.setattr(theme_loader, "get_script_run_ctx", lambda: None)
+    token = theme_loader._CURRENT_SESSION_ID.set("s2")
+    try:
+        theme = theme_loader.config.get_options_for_section("theme")
+        assert theme["primaryColor"] == "#88c0d0"
+
+        # The client ID is forgotten once the session shuts down
+        AppSession.shutdown(app_session)
+        assert theme_loader.config.get_options_for_section("theme") == {}
+    finally:
+        theme_loader._CURRENT_SESSION_ID.reset(token)
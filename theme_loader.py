@@ -2,18 +2,36 @@
 
 This module provides per-session theme switching without modifying the
 shared config.toml file. Each browser session can have its own theme.
+
+Session themes are kept in a pluggable ThemeStore. The default store is
+in-memory and keyed by session ID. Set THEME_STORE_SQLITE_PATH to share themes
+between workers on one host, or call set_theme_store() with a
+KeyValueThemeStore to share them across replicas. Shared stores are keyed by a
+per-tab client ID kept in the URL, so a tab that reconnects to another worker
+or replica finds its theme again.
 """
 
+import functools
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
 import tomllib
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from contextvars import ContextVar
+from pathlib import Path
+from typing import Protocol
+from urllib.parse import parse_qs
 
 import streamlit as st
-from streamlit import config
+from streamlit import config, runtime
 from streamlit.runtime.app_session import AppSession
 from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-# Store themes per session (using session ID as key)
-_SESSION_THEMES: dict[str, dict] = {}
 _PATCHED = False
 
 # Context variable to track which session is currently creating a NewSession message
@@ -22,6 +40,309 @@ _CURRENT_SESSION_ID: ContextVar[str | None] = ContextVar("current_session_id", d
 # Nested sections that should be handled separately
 _NESTED_SECTIONS = {"sidebar", "light", "dark"}
 
+# Directory that stored theme names are resolved against
+_THEMES_DIR = Path(__file__).parent / "themes"
+
+# Theme names are file stems; anything else read from a store is ignored
+_THEME_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+# Query param holding the per-tab client ID used to key shared stores
+_CLIENT_PARAM = "client"
+
+# Cookie mixed into the client key, so a shared link that carries a client ID
+# doesn't share the theme entry with another browser. Streamlit sets its XSRF
+# cookie by default; point this at a load balancer cookie if XSRF is disabled.
+_CLIENT_COOKIE = os.environ.get("THEME_STORE_COOKIE", "_streamlit_xsrf")
+
+# Client ID per session, for shared stores (cleared on session shutdown)
+_SESSION_CLIENT_IDS: dict[str, str] = {}
+
+
+class ThemeStore(ABC):
+    """Maps client keys to theme names.
+
+    Only the theme name is stored; it is resolved against the local themes
+    directory, and the parsed theme data is cached per process.
+    """
+
+    # Whether the store is shared with other processes. Shared stores are keyed
+    # by client ID instead of session ID, so entries survive reconnects.
+    shared = False
+
+    @abstractmethod
+    def get(self, client_key: str) -> str | None:
+        """Get the theme name stored for a client, or None."""
+
+    @abstractmethod
+    def set(self, client_key: str, theme_name: str) -> None:
+        """Store the theme name for a client."""
+
+
+class InMemoryThemeStore(ThemeStore):
+    """Default store, local to the current process."""
+
+    def __init__(self):
+        self._names: dict[str, str] = {}
+
+    def get(self, client_key: str) -> str | None:
+        return self._names.get(client_key)
+
+    def set(self, client_key: str, theme_name: str) -> None:
+        self._names[client_key] = theme_name
+
+
+class _ReadThroughThemeStore(ThemeStore):
+    """Base for shared stores with a bounded, short-lived local cache.
+
+    Entries (including misses) expire after ``ttl`` seconds, so a theme
+    changed by another worker or replica is picked up shortly after.
+    """
+
+    shared = True
+
+    def __init__(self, ttl: float = 5.0, maxsize: int = 1024):
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._cache: OrderedDict[str, tuple[float, str | None]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def get(self, client_key: str) -> str | None:
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(client_key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        theme_name = self._fetch(client_key)
+        self._remember(client_key, theme_name, now)
+        return theme_name
+
+    def set(self, client_key: str, theme_name: str) -> None:
+        self._store(client_key, theme_name)
+        self._remember(client_key, theme_name, time.monotonic())
+
+    def _remember(self, client_key: str, theme_name: str | None, now: float) -> None:
+        with self._cache_lock:
+            self._cache[client_key] = (now + self._ttl, theme_name)
+            self._cache.move_to_end(client_key)
+            while len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+
+    @abstractmethod
+    def _fetch(self, client_key: str) -> str | None:
+        """Read the theme name from the shared backend."""
+
+    @abstractmethod
+    def _store(self, client_key: str, theme_name: str) -> None:
+        """Write the theme name to the shared backend."""
+
+
+class SQLiteThemeStore(_ReadThroughThemeStore):
+    """Store backed by a SQLite file, shared by all workers on one host.
+
+    Entries not written for ``max_age`` seconds are pruned.
+    """
+
+    def __init__(self, db_path: str, max_age: float = 30 * 24 * 60 * 60, **kwargs):
+        super().__init__(**kwargs)
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_themes ("
+                "client_key TEXT PRIMARY KEY, "
+                "theme_name TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS session_themes_updated_at "
+                "ON session_themes (updated_at)"
+            )
+        self.prune()
+
+    def prune(self) -> None:
+        """Delete entries older than ``max_age``."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM session_themes WHERE updated_at < ?",
+                (time.time() - self._max_age,),
+            )
+
+    def _fetch(self, client_key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT theme_name FROM session_themes "
+                "WHERE client_key = ? AND updated_at >= ?",
+                (client_key, time.time() - self._max_age),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _store(self, client_key: str, theme_name: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_themes "
+                "(client_key, theme_name, updated_at) VALUES (?, ?, ?)",
+                (client_key, theme_name, time.time()),
+            )
+        self.prune()
+
+
+class KeyValueClient(Protocol):
+    """Minimal client interface for a network key-value store (e.g. Redis)."""
+
+    def get(self, key: str) -> str | bytes | None: ...
+
+    def set(self, key: str, value: str) -> object: ...
+
+
+class LocalKeyValueClient:
+    """In-process stand-in for a network key-value store, for testing."""
+
+    def __init__(self):
+        self._data: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+
+
+class KeyValueThemeStore(_ReadThroughThemeStore):
+    """Store backed by a network key-value store shared across replicas.
+
+    Expiring old entries is left to the backend (e.g. a Redis maxmemory policy).
+    """
+
+    def __init__(
+        self, client: KeyValueClient, prefix: str = "st-theme-gallery:", **kwargs
+    ):
+        super().__init__(**kwargs)
+        self._client = client
+        self._prefix = prefix
+
+    def _fetch(self, client_key: str) -> str | None:
+        value = self._client.get(self._prefix + client_key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    def _store(self, client_key: str, theme_name: str) -> None:
+        self._client.set(self._prefix + client_key, theme_name)
+
+
+def _create_default_store() -> ThemeStore:
+    """Create the store configured via the environment (in-memory by default)."""
+    db_path = os.environ.get("THEME_STORE_SQLITE_PATH")
+    if db_path:
+        return SQLiteThemeStore(db_path)
+    return InMemoryThemeStore()
+
+
+# Store theme names per client (see _get_client_key)
+_STORE: ThemeStore = _create_default_store()
+
+
+def set_theme_store(store: ThemeStore) -> None:
+    """Replace the backend used to store per-session themes.
+
+    Call this once at startup, before any theme is loaded.
+    """
+    global _STORE
+    _STORE = store
+
+
+def set_themes_dir(themes_dir: str) -> None:
+    """Set the directory that theme names are resolved against.
+
+    Call this once at startup if themes don't live next to this module.
+    """
+    global _THEMES_DIR
+    _THEMES_DIR = Path(themes_dir)
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_theme_file(theme_path: str, mtime_ns: int) -> dict:
+    """Parse the [theme] table of a theme file (cached per file version)."""
+    # tomllib requires binary mode
+    with open(theme_path, "rb") as f:
+        return tomllib.load(f).get("theme", {})
+
+
+def _load_theme_data(theme_path: Path) -> dict:
+    """Load theme data, re-parsing the file only when it has changed."""
+    return _parse_theme_file(str(theme_path), theme_path.stat().st_mtime_ns)
+
+
+def _get_cookie(session_id: str, name: str) -> str | None:
+    """Get a cookie from the session's initial request, across Streamlit versions."""
+    if not runtime.exists():
+        return None
+    client = runtime.get_instance().get_client(session_id)
+    if client is None:
+        return None
+    # Newer versions expose a ClientContext, older (Tornado) ones the request
+    for attr in ("client_context", "request"):
+        cookies = getattr(getattr(client, attr, None), "cookies", None)
+        if cookies and name in cookies:
+            value = cookies[name]
+            # Tornado returns Morsel objects
+            return getattr(value, "value", value)
+    return None
+
+
+def _get_client_id_from_query_string(query_string: str) -> str | None:
+    """Get the client ID from a raw query string, if present."""
+    values = parse_qs(query_string).get(_CLIENT_PARAM)
+    return values[0] if values else None
+
+
+def _get_client_key(session_id: str) -> str:
+    """Get the store key for a session.
+
+    The in-memory store is keyed by session ID. Shared stores use the tab's
+    client ID (hashed with the browser cookie, if set), which survives
+    reconnects to another worker or replica.
+    """
+    client_id = _SESSION_CLIENT_IDS.get(session_id) if _STORE.shared else None
+    if client_id is None:
+        return session_id
+    cookie = _get_cookie(session_id, _CLIENT_COOKIE) or ""
+    return hashlib.sha256(f"{cookie}:{client_id}".encode()).hexdigest()
+
+
+def _sync_client_id(session_id: str) -> None:
+    """Record the client ID from the current tab's URL for the session."""
+    client_id = st.query_params.get(_CLIENT_PARAM)
+    if client_id:
+        _SESSION_CLIENT_IDS[session_id] = client_id
+    else:
+        _SESSION_CLIENT_IDS.pop(session_id, None)
+
+
+def _get_stored_theme_name(session_id: str) -> str | None:
+    """Get the valid theme name stored for a session, if any."""
+    theme_name = _STORE.get(_get_client_key(session_id))
+    if theme_name is None or not _THEME_NAME_PATTERN.fullmatch(theme_name):
+        return None
+    return theme_name
+
+
+def _get_session_theme_data(session_id: str) -> dict | None:
+    """Resolve the theme data stored for a session, if any."""
+    theme_name = _get_stored_theme_name(session_id)
+    if theme_name is None:
+        return None
+    try:
+        return _load_theme_data(_THEMES_DIR / f"{theme_name}.toml")
+    except OSError:
+        # Theme isn't available in this deployment
+        return None
+
 
 def _get_current_session_id() -> str | None:
     """Get the current session ID from script context or context variable."""
@@ -71,11 +392,15 @@ def _get_session_id_from_app_session(app_session: AppSession) -> str | None:
     return None
 
 
-def _apply_patch():
-    """Apply the monkey-patch to intercept theme config loading."""
+def _apply_patch() -> bool:
+    """Apply the monkey-patch to intercept theme config loading.
+
+    Returns:
+        True if the patch was applied by this call, False if already applied.
+    """
     global _PATCHED
     if _PATCHED:
-        return
+        return False
 
     # Patch 1: Wrap _create_new_session_message to set session ID context
     _original_create_msg = AppSession._create_new_session_message
@@ -94,15 +419,40 @@ def _apply_patch():
 
     AppSession._create_new_session_message = _patched_create_msg
 
-    # Patch 2: Intercept get_options_for_section for theme sections
+    # Patch 2: Remember the client ID sent with each rerun request, so the
+    # first NewSession message after a reconnect can use the stored theme
+    _original_request_rerun = AppSession.request_rerun
+
+    def _patched_request_rerun(self, client_state, *args, **kwargs):
+        session_id = _get_session_id_from_app_session(self)
+        query_string = getattr(client_state, "query_string", "")
+        client_id = _get_client_id_from_query_string(query_string)
+        if session_id and client_id:
+            _SESSION_CLIENT_IDS[session_id] = client_id
+        return _original_request_rerun(self, client_state, *args, **kwargs)
+
+    AppSession.request_rerun = _patched_request_rerun
+
+    # Patch 3: Forget the client ID when the session shuts down
+    _original_shutdown = AppSession.shutdown
+
+    def _patched_shutdown(self, *args, **kwargs):
+        session_id = _get_session_id_from_app_session(self)
+        if session_id:
+            _SESSION_CLIENT_IDS.pop(session_id, None)
+        return _original_shutdown(self, *args, **kwargs)
+
+    AppSession.shutdown = _patched_shutdown
+
+    # Patch 4: Intercept get_options_for_section for theme sections
     _original_get_options = config.get_options_for_section
 
     def _patched_get_options(section: str):
         # Only intercept theme-related sections
         if section == "theme" or section.startswith("theme."):
             session_id = _get_current_session_id()
-            if session_id and session_id in _SESSION_THEMES:
-                theme_data = _SESSION_THEMES[session_id]
+            theme_data = _get_session_theme_data(session_id) if session_id else None
+            if theme_data is not None:
                 result = _get_theme_for_section(theme_data, section)
                 if result is not None:
                     return result
@@ -111,10 +461,11 @@ def _apply_patch():
 
     config.get_options_for_section = _patched_get_options
     _PATCHED = True
+    return True
 
 
 def load_theme(theme_path: str) -> bool:
-    """Load per-session theme from a TOML file.
+    """Load per-session theme from a TOML file in the themes directory.
 
     Args:
         theme_path: Path to the theme TOML file.
@@ -122,39 +473,67 @@ def load_theme(theme_path: str) -> bool:
     Returns:
         True if theme was loaded and rerun triggered, False if already loaded.
     """
-    _apply_patch()
+    path = Path(theme_path)
+    return load_theme_by_name(path.stem, str(path.parent))
+
+
+def load_theme_by_name(theme_name: str, themes_dir: str) -> bool:
+    """Load per-session theme by name from the themes directory.
+
+    Args:
+        theme_name: Name of the theme (without .toml extension).
+        themes_dir: Path to the directory containing theme files. Must be the
+            directory configured with set_themes_dir(), since only the theme
+            name is stored.
+
+    Returns:
+        True if theme was loaded and rerun triggered, False if already loaded.
+    """
+    if Path(themes_dir).resolve() != _THEMES_DIR.resolve():
+        raise ValueError(
+            f"Themes must be loaded from {_THEMES_DIR}, not {themes_dir}. "
+            "Call set_themes_dir() to change the themes directory."
+        )
+
+    just_patched = _apply_patch()
 
     ctx = get_script_run_ctx()
     if ctx is None:
         return False
 
-    # Load theme data (tomllib requires binary mode)
-    with open(theme_path, "rb") as f:
-        theme_data = tomllib.load(f).get("theme", {})
+    if _STORE.shared:
+        # Give each tab a client ID in the URL that survives reconnects
+        if not st.query_params.get(_CLIENT_PARAM):
+            st.query_params[_CLIENT_PARAM] = uuid.uuid4().hex
+        _sync_client_id(ctx.session_id)
 
-    # Check if this is a new theme for this session
-    current_theme = _SESSION_THEMES.get(ctx.session_id)
-    if current_theme == theme_data:
+    # The NewSession message for this run already used the stored theme,
+    # unless the patch was only installed now
+    client_key = _get_client_key(ctx.session_id)
+    if not just_patched and _STORE.get(client_key) == theme_name:
         return False
 
+    # Parse eagerly so an invalid theme file fails here, not mid-session
+    _load_theme_data(_THEMES_DIR / f"{theme_name}.toml")
+
     # Update session-specific theme
-    _SESSION_THEMES[ctx.session_id] = theme_data
+    _STORE.set(client_key, theme_name)
     st.rerun()
     return True
 
 
-def load_theme_by_name(theme_name: str, themes_dir: str) -> bool:
-    """Load per-session theme by name from a themes directory.
+def get_session_theme_name() -> str | None:
+    """Get the theme name stored for the current session, if any.
 
-    Args:
-        theme_name: Name of the theme (without .toml extension).
-        themes_dir: Path to the directory containing theme files.
-
-    Returns:
-        True if theme was loaded and rerun triggered, False if already loaded.
+    With a shared store, this also finds the theme of a tab that reconnected
+    to another worker or replica.
     """
-    theme_path = f"{themes_dir}/{theme_name}.toml"
-    return load_theme(theme_path)
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    if _STORE.shared:
+        _sync_client_id(ctx.session_id)
+    return _get_stored_theme_name(ctx.session_id)
 
 
 def get_current_session_theme_data() -> dict | None:
@@ -162,4 +541,4 @@ def get_current_session_theme_data() -> dict | None:
     ctx = get_script_run_ctx()
     if ctx is None:
         return None
-    return _SESSION_THEMES.get(ctx.session_id)
+    return _get_session_theme_data(ctx.session_id)